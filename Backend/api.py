@@ -1,77 +1,339 @@
 # api.py - Conexión a la API REST Countries y procesamiento de datos
 
-import requests
-import json
-from typing import List, Dict, Any
-from utils import calculate_density  # Función para calcular densidad (población / área)
+import asyncio
+import hashlib
+import sys
+import time
+import httpx
+import numpy as np
+import orjson
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Tuple
+from utils import calculate_densities, top_n_indices
 
 # URL de la API REST Countries
-REST_COUNTRIES_URL = "https://restcountries.com/v3.1/all "
+REST_COUNTRIES_URL = "https://restcountries.com/v3.1/all"
 
-def get_countries() -> List[Dict[str, Any]]:
+# Campos solicitados a la API; el resto del payload de cada país no se usa
+REST_COUNTRIES_FIELDS = "name,population,area,region,subregion,languages,currencies"
+
+# Tiempo de vida (en segundos) de los datos en caché; REST Countries cambia como mucho a diario
+CACHE_TTL_SECONDS = 3600
+
+# Caché en memoria del proceso y candado para que las solicitudes concurrentes compartan una sola descarga
+_CACHE = {"data": None, "table": None, "bodies": None, "ts": 0.0}
+_LOCK = asyncio.Lock()
+
+# Tras una descarga fallida, su resultado se comparte durante unos segundos: las solicitudes que
+# esperaban el candado (y las siguientes) reciben ese fallo en lugar de repetir la descarga en serie
+RETRY_AFTER_FAILURE_SECONDS = 30
+_LAST_FAILURE = {"result": None, "ts": 0.0}
+
+# Cliente HTTP asíncrono reutilizado por todo el módulo (no bloquea el event loop).
+# Mantiene conexiones HTTP/2 abiertas para no repetir DNS + TCP + TLS en cada descarga
+# y pide la respuesta comprimida (httpx la descomprime de forma transparente).
+_CLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=10,
+    limits=httpx.Limits(max_keepalive_connections=10),
+    headers={"Accept-Encoding": "gzip, br"}
+)
+
+async def close_client() -> None:
     """
-    Obtiene datos de todos los países desde la API REST Countries y los transforma en una estructura tabular.
+    Cierra el cliente HTTP compartido y sus conexiones abiertas.
+    """
+    await _CLIENT.aclose()
+
+@dataclass
+class CountryTable:
+    """
+    Vista columnar (SoA) de los países: un arreglo NumPy por campo, alineados por índice.
+    Permite ordenar, filtrar y calcular estadísticas sin recorrer diccionarios fila por fila.
+    """
+    names: np.ndarray  # object
+    regions: np.ndarray  # object
+    populations: np.ndarray  # int64
+    areas: np.ndarray  # float64
+    densities: np.ndarray  # float64
+    # Índices precalculados al descargar: región en minúsculas -> filas, y top 10 por métrica
+    by_region: Dict[str, List[int]]
+    top_populations: np.ndarray  # int64
+    top_areas: np.ndarray  # int64
+
+def _is_fresh() -> bool:
+    """
+    Indica si la caché tiene datos y todavía no superó CACHE_TTL_SECONDS.
+    """
+    return _CACHE["data"] is not None and time.monotonic() - _CACHE["ts"] < CACHE_TTL_SECONDS
+
+def _recent_failure() -> Optional[Dict[str, Any]]:
+    """
+    Devuelve el resultado de la última descarga fallida si ocurrió hace menos de RETRY_AFTER_FAILURE_SECONDS.
+    """
+    if _LAST_FAILURE["result"] is not None and time.monotonic() - _LAST_FAILURE["ts"] < RETRY_AFTER_FAILURE_SECONDS:
+        return _LAST_FAILURE["result"]
+    return None
+
+async def _load_cache(force: bool = False) -> Dict[str, Any]:
+    """
+    Devuelve la caché vigente, descargando los datos de nuevo si expiró.
+
+    Args:
+        force (bool): Si es True, descarga de nuevo aunque la caché siga vigente.
+
+    Returns:
+        Dict: Diccionario con la lista de países ("data"), su vista columnar ("table")
+        y las respuestas JSON ya serializadas con su ETag ("bodies").
+    """
+    if not force and _is_fresh():
+        return _CACHE
+
+    async with _LOCK:
+        # Volver a comprobar: otra solicitud pudo haber llenado la caché mientras esperábamos el candado
+        if not force and _is_fresh():
+            return _CACHE
+        # ... o pudo haber fallado hace poco: compartir ese resultado sin volver a descargar
+        if not force and _recent_failure() is not None:
+            return _recent_failure()
+
+        data, table = await _fetch_countries()
+        bodies = await asyncio.to_thread(_build_bodies, data, table)
+        if not data:
+            if _CACHE["data"]:
+                # Ya hay datos de una descarga anterior: seguir sirviéndolos (vencidos) y reintentar pronto
+                result = _CACHE
+            else:
+                # No se cachean errores para no servir una lista vacía durante una hora
+                # (tampoco en el cliente: sin ETag, la respuesta se envía como no cacheable)
+                bodies = {key: (body, None) for key, (body, _) in bodies.items()}
+                result = {"data": data, "table": table, "bodies": bodies, "ts": 0.0}
+            _LAST_FAILURE["result"] = result
+            _LAST_FAILURE["ts"] = time.monotonic()
+            return result
+
+        _LAST_FAILURE["result"] = None
+        _CACHE["data"] = data
+        _CACHE["table"] = table
+        _CACHE["bodies"] = bodies
+        _CACHE["ts"] = time.monotonic()
+        return _CACHE
+
+async def get_countries(force: bool = False) -> List[Dict[str, Any]]:
+    """
+    Devuelve los datos de todos los países, usando la caché en memoria mientras no haya expirado.
+
+    Args:
+        force (bool): Si es True, ignora la caché vigente y vuelve a descargar los datos.
 
     Returns:
         List[Dict]: Lista de diccionarios con datos procesados de cada país.
     """
+    return (await _load_cache(force))["data"]
+
+async def refresh_countries() -> bool:
+    """
+    Fuerza una nueva descarga de los países (usado por el refresco en segundo plano).
+
+    Returns:
+        bool: True si la descarga tuvo éxito; False si falló y se siguen sirviendo los datos anteriores.
+    """
+    await _load_cache(force=True)
+    return _LAST_FAILURE["result"] is None
+
+async def get_country_table() -> CountryTable:
+    """
+    Devuelve la vista columnar de los países, compartiendo la misma caché que get_countries().
+
+    Returns:
+        CountryTable: Arreglos NumPy con nombres, regiones, población, área y densidad.
+    """
+    return (await _load_cache())["table"]
+
+async def get_response_bodies() -> Dict[Tuple[str, Any], Tuple[bytes, str]]:
+    """
+    Devuelve las respuestas JSON de la API serializadas una sola vez por cada descarga.
+
+    Returns:
+        Dict: Pares (cuerpo JSON, ETag) listos para enviar, indexados por (endpoint, parámetro).
+        El ETag es None si la descarga falló y el cuerpo no debe cachearse.
+    """
+    return (await _load_cache())["bodies"]
+
+def _etag(body: bytes) -> str:
+    """
+    Calcula un ETag fuerte a partir del contenido: solo cambia si cambia el cuerpo.
+    """
+    return f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+def _build_bodies(data: List[Dict[str, Any]], table: CountryTable) -> Dict[Tuple[str, Any], Tuple[bytes, str]]:
+    """
+    Serializa con orjson todas las respuestas que solo dependen de los datos descargados.
+
+    Args:
+        data (List[Dict]): Lista de países procesados.
+        table (CountryTable): Vista columnar de los mismos países.
+
+    Returns:
+        Dict[Tuple[str, Any], Tuple[bytes, str]]: Cuerpo JSON y su ETag por (endpoint, parámetro):
+        ("countries", None), ("top-10", métrica) y ("filter", región en minúsculas).
+    """
+    countries = [
+        {
+            "name": country["Nombre"],
+            "population": country["Población"],
+            "area": country["Área(km²)"],
+            "density": country["Densidad(hab/km²)"],
+            "region": country["Región"],
+            "subregion": country["Subregión"]
+        }
+        for country in data
+    ]
+    bodies = {("countries", None): orjson.dumps(countries)}
+
+    # Top 10 por métrica a partir del orden precalculado (mismos valores que en /countries)
+    for metric, field, idx in (
+        ("population", "Población", table.top_populations),
+        ("area", "Área(km²)", table.top_areas)
+    ):
+        get_name_and_value = itemgetter("Nombre", field)
+        top_10 = [
+            {"name": name, "metric_value": value}
+            for name, value in (get_name_and_value(data[i]) for i in idx.tolist())
+        ]
+        bodies[("top-10", metric)] = orjson.dumps({"top_10": top_10})
+
+    # Un cuerpo por región para /filter
+    for region_key, idx in table.by_region.items():
+        filtered = [
+            {"name": name, "population": population, "region": region}
+            for name, population, region in zip(
+                table.names[idx].tolist(), table.populations[idx].tolist(), table.regions[idx].tolist()
+            )
+        ]
+        bodies[("filter", region_key)] = orjson.dumps(filtered)
+
+    return {key: (body, _etag(body)) for key, body in bodies.items()}
+
+async def _fetch_countries() -> Tuple[List[Dict[str, Any]], CountryTable]:
+    """
+    Obtiene datos de todos los países desde la API REST Countries y los transforma en una estructura tabular.
+
+    Returns:
+        Tuple[List[Dict], CountryTable]: Lista de diccionarios con datos procesados de cada país
+        y la misma información en formato columnar.
+    """
     try:
         # Realizar solicitud GET a la API REST Countries
-        response = requests.get(REST_COUNTRIES_URL, timeout=10)
+        response = await _CLIENT.get(REST_COUNTRIES_URL, params={"fields": REST_COUNTRIES_FIELDS})
         response.raise_for_status()  # Lanza excepción si hay error HTTP (ej.: 404, 500)
 
-        # Parsear respuesta JSON
-        raw_data = response.json()
-
-        # Procesar datos crudos y estructurarlos
-        structured_data = []
-        for country in raw_data:
-            # Extraer campos clave con valores predeterminados para evitar KeyError
-            name = country.get("name", {}).get("common", "N/A")
-            population = country.get("population", 0)
-            area = country.get("area", 0)
-            region = country.get("region", "N/A")
-            subregion = country.get("subregion", "N/A")
-            
-            # Extraer idiomas como cadena separada por comas
-            languages = ", ".join(country.get("languages", {}).values()) or "N/A"
-            
-            # Extraer monedas como cadena con código y nombre (ej.: "COP (Peso colombiano)")
-            currencies = country.get("currencies", {})
-            currency_list = []
-            for code, info in currencies.items():
-                if isinstance(info, dict) and "name" in info:
-                    currency_list.append(f"{code} ({info['name']})")
-            currency_str = ", ".join(currency_list) or "N/A"
-
-            # Calcular densidad poblacional
-            density = calculate_density(population, area)
-
-            # Agregar país estructurado a la lista final
-            structured_data.append({
-                "Nombre": name,
-                "Población": population,
-                "Área(km²)": area,
-                "Densidad(hab/km²)": density,
-                "Región": region,
-                "Subregión": subregion,
-                "Idiomas": languages,
-                "Monedas": currency_str
-            })
-
-        return structured_data
-
-    except requests.exceptions.RequestException as e:
+        # Parsear y estructurar en un hilo aparte: es trabajo de CPU que bloquearía el event loop
+        return await asyncio.to_thread(_decode_countries, response.content)
+
+    except httpx.HTTPError as e:
         # Manejar errores de conexión (ej.: timeout, servidor caído)
         print(f"Error al conectar con la API REST Countries: {e}")
-        return []
+        return _parse_countries([])
 
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         # Manejar errores en el formato JSON de la respuesta
         print(f"Error al decodificar la respuesta JSON: {e}")
-        return []
+        return _parse_countries([])
 
     except Exception as e:
         # Capturar cualquier otro error inesperado
         print(f"Error inesperado al procesar datos: {e}")
-        return []
\ No newline at end of file
+        return _parse_countries([])
+
+def _decode_countries(content: bytes) -> Tuple[List[Dict[str, Any]], CountryTable]:
+    """
+    Parsea la respuesta JSON directamente desde los bytes con orjson y la estructura.
+
+    Args:
+        content (bytes): Cuerpo de la respuesta de REST Countries.
+
+    Returns:
+        Tuple[List[Dict], CountryTable]: Filas procesadas y su vista columnar.
+    """
+    return _parse_countries(orjson.loads(content))
+
+def _parse_countries(raw_data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], CountryTable]:
+    """
+    Transforma la respuesta cruda de REST Countries en filas y en columnas NumPy.
+
+    Args:
+        raw_data (List[Dict]): Lista de países tal como la devuelve la API.
+
+    Returns:
+        Tuple[List[Dict], CountryTable]: Filas procesadas y su vista columnar.
+    """
+    count = len(raw_data)
+
+    # Columnas numéricas en una sola pasada cada una, sin objetos intermedios
+    populations = np.fromiter((country.get("population", 0) for country in raw_data), dtype=np.int64, count=count)
+    areas = np.fromiter((country.get("area", 0) for country in raw_data), dtype=np.float64, count=count)
+
+    # Densidad poblacional vectorizada; los países sin área válida quedan en 0.0
+    densities = calculate_densities(populations, areas)
+
+    # Procesar datos crudos y estructurarlos
+    structured_data = []
+    names = []
+    regions = []
+    by_region = {}
+    for i, (country, density) in enumerate(zip(raw_data, densities.tolist())):
+        # Extraer campos clave con valores predeterminados para evitar KeyError
+        name = country.get("name", {}).get("common", "N/A")
+        population = country.get("population", 0)
+        area = country.get("area", 0)
+        region = country.get("region", "N/A")
+        subregion = country.get("subregion", "N/A")
+        # Clave de región normalizada una sola vez e internada (vocabulario fijo de ~6 regiones)
+        region_key = sys.intern(region.lower())
+
+        # Extraer idiomas como lista y como cadena separada por comas
+        language_list = list(country.get("languages", {}).values())
+        languages = ", ".join(language_list) or "N/A"
+
+        # Extraer monedas como pares (código, nombre) y como cadena (ej.: "COP (Peso colombiano)")
+        currencies = country.get("currencies", {})
+        currency_pairs = [
+            (code, info["name"])
+            for code, info in currencies.items()
+            if isinstance(info, dict) and "name" in info
+        ]
+        currency_str = ", ".join([f"{code} ({name})" for code, name in currency_pairs]) or "N/A"
+
+        names.append(name)
+        regions.append(region)
+        by_region.setdefault(region_key, []).append(i)
+
+        # Agregar país estructurado a la lista final
+        structured_data.append({
+            "Nombre": name,
+            "Población": population,
+            "Área(km²)": area,
+            "Densidad(hab/km²)": density,
+            "Región": region,
+            "Subregión": subregion,
+            "Idiomas": languages,
+            "Monedas": currency_str,
+            # Versiones estructuradas para no volver a separar las cadenas anteriores
+            "_languages": language_list,
+            "_currencies": currency_pairs,
+            "_region_key": region_key
+        })
+
+    table = CountryTable(
+        names=np.array(names, dtype=object),
+        regions=np.array(regions, dtype=object),
+        populations=populations,
+        areas=areas,
+        densities=densities,
+        by_region=by_region,
+        top_populations=top_n_indices(populations, 10),
+        top_areas=top_n_indices(areas, 10)
+    )
+    return structured_data, table
@@ -1,25 +1,28 @@
 # main.py - Backend con FastAPI
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-import requests
-from typing import List, Dict, Any
+from fastapi.responses import ORJSONResponse
+import asyncio
+import sys
+from operator import attrgetter
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
-from fastapi import Query
-from api import get_countries
-from utils import calculate_density
+from fastapi import Query, Path
+from api import CACHE_TTL_SECONDS, RETRY_AFTER_FAILURE_SECONDS, get_countries, get_country_table, get_response_bodies, refresh_countries, close_client
+from utils import calculate_density, calculate_median, mean_and_m2
 
 # Definición de modelos Pydantic para validación de datos
 class CountryModel(BaseModel):
     name: str
     population: int
-    area: int
+    area: float  # REST Countries envía el área como número decimal (ej.: 0.49)
     density: float
     region: str
     subregion: str
 
 class Top10CountryModel(BaseModel):
     name: str
-    metric_value: int
+    metric_value: float  # Población (entera) o área (decimal)
 
 class Top10Response(BaseModel):
     top_10: List[Top10CountryModel]
@@ -40,7 +43,8 @@ class StatsResponse(BaseModel):
 app = FastAPI(
     title="REST Countries API Dashboard",
     description="API personalizada para análisis y visualización de datos geográficos y demográficos",
-    version="1.0"
+    version="1.0",
+    default_response_class=ORJSONResponse  # Serializa todas las respuestas con orjson
 )
 
 # Configurar CORS para permitir solicitudes desde el frontend
@@ -52,9 +56,79 @@ app.add_middleware(
     allow_headers=["*"],  # Permite todas las cabeceras
 )
 
+# Intervalo de refresco en segundo plano: antes de que expire la caché, para que ningún
+# usuario pague la descarga al cruzar el TTL
+REFRESH_INTERVAL_SECONDS = CACHE_TTL_SECONDS - 600
+
+async def refresh_countries_periodically(delay: float):
+    """
+    Vuelve a descargar los datos de REST Countries cada REFRESH_INTERVAL_SECONDS,
+    o tras RETRY_AFTER_FAILURE_SECONDS si la última descarga falló.
+
+    Args:
+        delay (float): Espera antes del primer refresco.
+    """
+    while True:
+        await asyncio.sleep(delay)
+        refreshed = await refresh_countries()
+        delay = REFRESH_INTERVAL_SECONDS if refreshed else RETRY_AFTER_FAILURE_SECONDS
+
+# Precargar la caché al iniciar para que la primera solicitud no espere la descarga
+@app.on_event("startup")
+async def warm_cache():
+    delay = REFRESH_INTERVAL_SECONDS if await get_countries() else RETRY_AFTER_FAILURE_SECONDS
+    app.state.refresh_task = asyncio.create_task(refresh_countries_periodically(delay))
+
+# Detener el refresco y cerrar las conexiones persistentes con REST Countries al apagar el servidor
+@app.on_event("shutdown")
+async def shutdown_client():
+    app.state.refresh_task.cancel()
+    await close_client()
+
+# Los clientes y CDNs pueden reutilizar una respuesta mientras dure la caché del servidor
+CACHE_CONTROL = f"public, max-age={CACHE_TTL_SECONDS}"
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Compara If-None-Match con el ETag usando la comparación débil de RFC 9110:
+    "*" coincide con cualquier versión y se ignora el prefijo W/ (que añaden proxies al comprimir).
+
+    Args:
+        if_none_match (str): Valor de la cabecera If-None-Match (lista separada por comas).
+        etag (str): ETag actual del cuerpo.
+
+    Returns:
+        bool: True si el cliente ya tiene esta versión.
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+def cached_json_response(request: Request, body: bytes, etag: Optional[str]) -> Response:
+    """
+    Devuelve un cuerpo JSON ya serializado, o 304 si el cliente tiene esa misma versión.
+
+    Args:
+        request (Request): Solicitud entrante (se lee la cabecera If-None-Match).
+        body (bytes): Cuerpo JSON cacheado.
+        etag (Optional[str]): ETag calculado a partir de ese cuerpo, o None si no debe cachearse.
+
+    Returns:
+        Response: Respuesta 200 con el cuerpo o 304 sin cuerpo.
+    """
+    if etag is None:
+        return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-store"})
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 # Endpoint: Obtener todos los países con datos estructurados
 @app.get("/api/v1/countries", response_model=List[CountryModel])
-async def get_all_countries():
+async def get_all_countries(request: Request):
     """
     Devuelve una lista de todos los países con datos estructurados:
     - Nombre
@@ -65,45 +139,23 @@ async def get_all_countries():
     - Subregión
     """
     try:
-        countries = get_countries()
-        structured_data = []
-        for country in countries:
-            structured_data.append({
-                "name": country["Nombre"],
-                "population": country["Población"],
-                "area": country["Área(km²)"],
-                "density": country["Densidad(hab/km²)"],
-                "region": country["Región"],
-                "subregion": country["Subregión"]
-            })
-        return structured_data
+        # El cuerpo JSON se serializa una vez por descarga; se devuelve tal cual sin revalidar cada fila
+        bodies = await get_response_bodies()
+        return cached_json_response(request, *bodies[("countries", None)])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener datos: {e}")
 
 # Endpoint: Obtener top 10 países por métrica (población, área)
 @app.get("/api/v1/top-10/{metric}", response_model=Top10Response)
-async def top_10(metric: str = Query(..., regex="^(population|area)$")):
+async def top_10(request: Request, metric: str = Path(..., regex="^(population|area)$")):
     """
     Devuelve los 10 países con mayor valor en una métrica específica:
     - Metric: "population" o "area"
     Ejemplo: /api/v1/top-10/population
     """
     try:
-        countries = get_countries()
-        # Validar métrica y ordenar
-        if metric == "population":
-            sorted_list = sorted(countries, key=lambda x: x["Población"], reverse=True)[:10]
-        elif metric == "area":
-            sorted_list = sorted(countries, key=lambda x: x["Área(km²)"], reverse=True)[:10]
-        else:
-            raise HTTPException(status_code=400, detail="Métrica no válida")
-        
-        # Transformar a formato esperado
-        top_10_data = [
-            {"name": country["Nombre"], "metric_value": country["Población"] if metric == "population" else country["Área(km²)"]}
-            for country in sorted_list
-        ]
-        return {"top_10": top_10_data}
+        bodies = await get_response_bodies()
+        return cached_json_response(request, *bodies[("top-10", metric)])
     except KeyError:
         raise HTTPException(status_code=400, detail=f"Métrica '{metric}' no válida.")
     except Exception as e:
@@ -111,20 +163,30 @@ async def top_10(metric: str = Query(..., regex="^(population|area)$")):
 
 # Endpoint: Filtrar países por región
 @app.get("/api/v1/filter", response_model=List[FilteredCountryModel])
-async def filter_by_region(region: str):
+async def filter_by_region(request: Request, region: str):
     """
     Filtra países por región (ej.: "Americas", "Europe")
     Ejemplo: /api/v1/filter?region=Americas
     """
     try:
-        countries = get_countries()
-        filtered = [country for country in countries if country["Región"].lower() == region.lower()]
-        if not filtered:
+        bodies = await get_response_bodies()
+        # Búsqueda directa del cuerpo ya serializado para la región
+        cached = bodies.get(("filter", sys.intern(region.lower())))
+        if cached is None:
             raise HTTPException(status_code=404, detail=f"No se encontraron países en la región '{region}'")
-        return filtered
+        return cached_json_response(request, *cached)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al filtrar datos: {e}")
 
+# Columna de CountryTable correspondiente a cada métrica de /stats
+STATS_COLUMNS = {
+    "population": attrgetter("populations"),
+    "area": attrgetter("areas"),
+    "density": attrgetter("densities")
+}
+
 # Endpoint: Calcular estadísticas básicas
 @app.get("/api/v1/stats", response_model=StatsResponse)
 async def calculate_stats(metric: str = Query(..., regex="^(population|area|density)$")):
@@ -133,21 +195,23 @@ async def calculate_stats(metric: str = Query(..., regex="^(population|area|dens
     - Metric: "population", "area" o "density"
     """
     try:
-        countries = get_countries()
-        # Seleccionar métrica
-        if metric == "population":
-            values = [country["Población"] for country in countries if country["Población"] > 0]
-        elif metric == "area":
-            values = [country["Área(km²)"] for country in countries if country["Área(km²)"] > 0]
-        elif metric == "density":
-            values = [country["Densidad(hab/km²)"] for country in countries if country["Densidad(hab/km²)"] > 0]
-        else:
+        table = await get_country_table()
+        # Seleccionar métrica con una sola búsqueda en el diccionario de columnas
+        get_column = STATS_COLUMNS.get(metric)
+        if get_column is None:
             raise HTTPException(status_code=400, detail="Métrica no válida")
+        column = get_column(table)
+
+        # Filtrar valores válidos (mayores a 0) con una máscara booleana
+        values = column[column > 0]
+        if values.size == 0:
+            raise HTTPException(status_code=400, detail="No hay suficientes datos para calcular estadísticas.")
 
-        # Calcular estadísticas
-        mean = round(sum(values) / len(values), 2)
-        median = sorted(values)[len(values) // 2] if len(values) % 2 == 1 else (sorted(values)[len(values)//2 - 1] + sorted(values)[len(values)//2]) / 2
-        variance = round(sum((x - mean) ** 2 for x in values) / len(values), 2)
+        # Calcular estadísticas (cantidad, media y M2 para la varianza)
+        count, mean, m2 = mean_and_m2(values)
+        mean = round(mean, 2)
+        median = calculate_median(values)
+        variance = round(m2 / count, 2)
         std_dev = round(variance ** 0.5, 2)
 
         return {
@@ -157,8 +221,8 @@ async def calculate_stats(metric: str = Query(..., regex="^(population|area|dens
             "variance": variance,
             "std_dev": std_dev
         }
-    except ZeroDivisionError:
-        raise HTTPException(status_code=400, detail="No hay suficientes datos para calcular estadísticas.")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al calcular estadísticas: {e}")
 
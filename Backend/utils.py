@@ -1,7 +1,37 @@
 # utils.py - Funciones auxiliares para el backend
 
-import statistics
-from typing import List, Dict, Any, Optional
+import math
+import sys
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+# Numba es opcional: si está instalado, los cálculos por elemento se compilan a código nativo
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _densities_kernel(populations, areas):
+        out = np.empty(areas.shape[0], dtype=np.float64)
+        for i in range(areas.shape[0]):
+            out[i] = 0.0 if areas[i] <= 0 else round(populations[i] / areas[i], 2)
+        return out
+
+    @njit(cache=True)
+    def _welford_kernel(values):
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        for i in range(values.shape[0]):
+            x = float(values[i])
+            count += 1
+            delta = x - mean
+            mean += delta / count
+            m2 += (x - mean) * delta
+        return count, mean, m2
 
 def calculate_density(population: int, area: int) -> float:
     """
@@ -21,6 +51,83 @@ def calculate_density(population: int, area: int) -> float:
     except ZeroDivisionError:
         return 0.0
 
+def calculate_densities(populations: np.ndarray, areas: np.ndarray) -> np.ndarray:
+    """
+    Versión vectorizada de calculate_density para columnas completas.
+    
+    Args:
+        populations (np.ndarray): Población de cada país.
+        areas (np.ndarray): Área de cada país en km².
+        
+    Returns:
+        np.ndarray: Densidades (float64) redondeadas a 2 decimales; 0.0 donde el área no es válida.
+    """
+    if NUMBA_AVAILABLE:
+        return _densities_kernel(populations, areas)
+    return np.divide(populations, areas, out=np.zeros(len(areas)), where=areas > 0).round(2)
+
+def mean_and_m2(values: np.ndarray) -> Tuple[int, float, float]:
+    """
+    Calcula cantidad, media y suma de cuadrados de las desviaciones (M2).
+    Con Numba usa el algoritmo de Welford en una sola pasada; sin Numba, values.mean()
+    y values.var() de NumPy (varias pasadas vectorizadas, también estables).
+    
+    Args:
+        values (np.ndarray): Arreglo numérico unidimensional.
+        
+    Returns:
+        Tuple[int, float, float]: (n, media, M2). La varianza poblacional es M2 / n
+        y la muestral M2 / (n - 1).
+    """
+    if NUMBA_AVAILABLE:
+        return _welford_kernel(values)
+    count = len(values)
+    if count == 0:
+        return 0, 0.0, 0.0
+    mean = float(values.mean())
+    return count, mean, float(values.var()) * count
+
+def top_n_indices(values: np.ndarray, n: int = 10) -> np.ndarray:
+    """
+    Devuelve los índices de los n valores más altos, de mayor a menor.
+    Usa np.argpartition (O(len)) y ordena solo los n elegidos en lugar de todo el arreglo.
+    
+    Args:
+        values (np.ndarray): Arreglo numérico unidimensional.
+        n (int): Cantidad de índices a devolver.
+        
+    Returns:
+        np.ndarray: Índices (int64) de los n mayores valores en orden descendente.
+    """
+    n = min(n, len(values))
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    
+    idx = np.argpartition(-values, n - 1)[:n]
+    return idx[np.argsort(-values[idx])]
+
+def calculate_median(values: np.ndarray) -> float:
+    """
+    Calcula la mediana en O(n) con np.partition, sin ordenar el arreglo completo.
+    
+    Args:
+        values (np.ndarray): Arreglo numérico unidimensional.
+        
+    Returns:
+        float: Mediana de los valores (0.0 si el arreglo está vacío).
+    """
+    n = len(values)
+    if n == 0:
+        return 0.0
+    
+    mid = n // 2
+    if n % 2 == 1:
+        return float(np.partition(values, mid)[mid])
+    
+    # Con cantidad par basta ubicar los dos elementos centrales
+    partitioned = np.partition(values, [mid - 1, mid])
+    return float((partitioned[mid - 1] + partitioned[mid]) / 2)
+
 def calculate_statistics(data: List[Dict[str, Any]], metric: str = "Población") -> Dict[str, float]:
     """
     Calcula métricas estadísticas (media, mediana, varianza, desviación estándar) 
@@ -35,9 +142,12 @@ def calculate_statistics(data: List[Dict[str, Any]], metric: str = "Población")
     """
     try:
         # Filtrar valores válidos (mayores a 0)
-        values = [country[metric] for country in data if country.get(metric, 0) > 0]
+        values = np.fromiter(
+            (country[metric] for country in data if country.get(metric, 0) > 0),
+            dtype=np.float64
+        )
         
-        if not values:
+        if values.size == 0:
             return {
                 "mean": 0.0,
                 "median": 0.0,
@@ -45,9 +155,11 @@ def calculate_statistics(data: List[Dict[str, Any]], metric: str = "Población")
                 "std_dev": 0.0
             }
         
-        mean = round(statistics.mean(values), 2)
-        median = round(statistics.median(values), 2)
-        variance = round(statistics.variance(values), 2) if len(values) > 1 else 0.0
+        # Media y varianza muestral (Welford con Numba, NumPy sin él); mediana en O(n)
+        count, mean, m2 = mean_and_m2(values)
+        mean = round(mean, 2)
+        median = round(calculate_median(values), 2)
+        variance = round(m2 / (count - 1), 2) if count > 1 else 0.0
         std_dev = round(variance ** 0.5, 2) if variance > 0 else 0.0
         
         return {
@@ -56,15 +168,6 @@ def calculate_statistics(data: List[Dict[str, Any]], metric: str = "Población")
             "variance": variance,
             "std_dev": std_dev
         }
-    except statistics.StatisticsError as e:
-        # Capturar errores de estadísticas (ej.: varianza en listas vacías)
-        print(f"Error al calcular estadísticas: {e}")
-        return {
-            "mean": 0.0,
-            "median": 0.0,
-            "variance": 0.0,
-            "std_dev": 0.0
-        }
     except Exception as e:
         print(f"Error inesperado al calcular estadísticas: {e}")
         return {
@@ -74,6 +177,16 @@ def calculate_statistics(data: List[Dict[str, Any]], metric: str = "Población")
             "std_dev": 0.0
         }
 
+# Campos obligatorios de un país procesado por api.get_countries()
+REQUIRED_COUNTRY_FIELDS = frozenset({
+    "Nombre",
+    "Población",
+    "Área(km²)",
+    "Densidad(hab/km²)",
+    "Región",
+    "Subregión"
+})
+
 def validate_country_data(country: Dict[str, Any]) -> bool:
     """
     Valida que un país tenga campos clave con valores válidos.
@@ -84,24 +197,15 @@ def validate_country_data(country: Dict[str, Any]) -> bool:
     Returns:
         bool: True si los datos son válidos, False en caso contrario.
     """
-    required_fields = [
-        "Nombre", 
-        "Población", 
-        "Área(km²)", 
-        "Densidad(hab/km²)", 
-        "Región", 
-        "Subregión"
-    ]
+    # Diferencia de conjuntos contra las claves del diccionario: una sola operación en C
+    if REQUIRED_COUNTRY_FIELDS - country.keys():
+        return False
     
-    for field in required_fields:
-        if field not in country:
-            print(f"Campo faltante: {field}")
-            return False
-        if isinstance(country[field], (int, float)) and country[field] < 0:
-            print(f"Valor inválido en campo {field}: {country[field]}")
+    for field in REQUIRED_COUNTRY_FIELDS:
+        value = country[field]
+        if isinstance(value, (int, float)) and value < 0:
             return False
-        if isinstance(country[field], str) and country[field] == "":
-            print(f"Campo vacío: {field}")
+        if isinstance(value, str) and value == "":
             return False
     return True
 
@@ -136,7 +240,13 @@ def filter_countries_by_region(data: List[Dict[str, Any]], region: str) -> List[
     Returns:
         List[Dict]: Lista de países en la región especificada.
     """
-    return [country for country in data if country.get("Región", "").lower() == region.lower()]
+    key = sys.intern(region.lower())
+    # "_region_key" ya viene normalizada e internada desde api.get_countries(), así que la
+    # comparación se resuelve por identidad sin crear cadenas nuevas por país
+    return [
+        country for country in data
+        if (country.get("_region_key") or country.get("Región", "").lower()) == key
+    ]
 
 def find_extreme_values(data: List[Dict[str, Any]], metric: str = "Población") -> Dict[str, Dict[str, Any]]:
     """
@@ -214,12 +324,15 @@ def extract_language_codes(country: Dict[str, Any]) -> Dict[str, str]:
     Returns:
         Dict[str, str]: Diccionario con códigos de idiomas y sus nombres.
     """
-    languages = country.get("Idiomas", "N/A")
-    if languages == "N/A":
-        return {}
+    # Lista estructurada que api.get_countries() guarda junto a la cadena "Idiomas"
+    language_list = country.get("_languages")
+    if language_list is None:
+        languages = country.get("Idiomas", "N/A")
+        if languages == "N/A":
+            return {}
+        language_list = languages.split(", ")
     
-    # Ejemplo: "Español, Inglés" -> {"spa": "Español", "eng": "Inglés"}
-    language_list = languages.split(", ")
+    # Ejemplo: ["Español", "Inglés"] -> {"lang_1": "Español", "lang_2": "Inglés"}
     return {f"lang_{i+1}": lang for i, lang in enumerate(language_list)}
 
 def clean_currency_format(currency_str: str) -> Dict[str, str]:
@@ -255,6 +368,10 @@ def find_country_by_name(data: List[Dict[str, Any]], name: str) -> Optional[Dict
     """
     return next((country for country in data if country["Nombre"].lower() == name.lower()), None)
 
+# Sufijos y divisores de format_population indexados por escala (unidades, miles, millones, miles de millones)
+_POPULATION_SUFFIXES = ("", "K", "M", "B")
+_POPULATION_DIVISORS = (1, 1_000, 1_000_000, 1_000_000_000)
+
 def format_population(population: int) -> str:
     """
     Formatea la población en notación legible (ej.: 1.38M para 1380004385).
@@ -265,11 +382,9 @@ def format_population(population: int) -> str:
     Returns:
         str: Población formateada.
     """
-    if population >= 1_000_000_000:
-        return f"{round(population / 1_000_000_000, 2)}B"
-    elif population >= 1_000_000:
-        return f"{round(population / 1_000_000, 2)}M"
-    elif population >= 1_000:
-        return f"{round(population / 1_000, 2)}K"
-    else:
-        return str(population)
\ No newline at end of file
+    if population < 1_000:
+        return str(population)
+    
+    # Escala (K, M, B) a partir de la cantidad de dígitos: un logaritmo y una búsqueda en tabla
+    tier = min(int(math.log10(population)) // 3, 3)
+    return f"{round(population / _POPULATION_DIVISORS[tier], 2)}{_POPULATION_SUFFIXES[tier]}"
\ No newline at end of file
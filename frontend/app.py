@@ -1,13 +1,18 @@
 # app.py - Configuración principal del dashboard con Plotly Dash
 
+from functools import lru_cache
 import dash
-from dash import html, dcc, Input, Output
-import requests
+from dash import html, Input, Output
+import dash_bootstrap_components as dbc
 import pandas as pd
+import plotly.io as pio
+from data import COUNTRIES_DF, REGION_SUMS, METRIC_COLUMNS
 from main_layout import generate_main_layout
+from _njit import top_n_indices
 from graphs import (
     generate_choropleth_map,
     generate_bar_chart,
+    generate_line_chart,
     generate_pie_chart,
     generate_scatter_chart
 )
@@ -16,187 +21,195 @@ from graphs import (
 app = dash.Dash(__name__, external_stylesheets=["https://cdn.jsdelivr.net/npm/bootstrap @5.3.0/dist/css/bootstrap.min.css"])
 server = app.server  # Requerido para despliegue en servidores como Heroku o Render
 
-# Datos simulados para pruebas (en producción, se obtienen del backend)
-countries_data = [
-    {"Nombre": "China", "Población": 1402112000, "Área(km²)": 9596961, "Densidad(hab/km²)": 146.1, "Región": "Asia"},
-    {"Nombre": "India", "Población": 1380004385, "Área(km²)": 3287590, "Densidad(hab/km²)": 419.7, "Región": "Asia"},
-    {"Nombre": "EE.UU.", "Población": 331002651, "Área(km²)": 9833520, "Densidad(hab/km²)": 34.7, "Región": "Americas"},
-    {"Nombre": "Indonesia", "Población": 273523615, "Área(km²)": 1904569, "Densidad(hab/km²)": 143.6, "Región": "Asia"},
-    {"Nombre": "Pakistán", "Población": 220752339, "Área(km²)": 881912, "Densidad(hab/km²)": 250.3, "Región": "Asia"},
-    {"Nombre": "Brasil", "Población": 212559417, "Área(km²)": 8515767, "Densidad(hab/km²)": 24.9, "Región": "Americas"},
-    {"Nombre": "Nigeria", "Población": 206139589, "Área(km²)": 923768, "Densidad(hab/km²)": 223.1, "Región": "Africa"},
-    {"Nombre": "Bangladesh", "Población": 164689383, "Área(km²)": 147570, "Densidad(hb/km²)": 1116.0, "Región": "Asia"},
-    {"Nombre": "Rusia", "Población": 145934462, "Área(km²)": 17098242, "Densidad(hab/km²)": 8.5, "Región": "Europe"},
-    {"Nombre": "México", "Población": 128932753, "Área(km²)": 1964375, "Densidad(hab/km²)": 65.6, "Región": "Americas"},
-    {"Nombre": "Colombia", "Población": 50882891, "Área(km²)": 1141748, "Densidad(hab/km²)": 44.56, "Región": "Americas"},
-    {"Nombre": "Argentina", "Población": 45376763, "Área(km²)": 2780400, "Densidad(hab/km²)": 16.3, "Región": "Americas"},
-    {"Nombre": "Kenia", "Población": 53771296, "Área(km²)": 580367, "Densidad(hab/km²)": 92.7, "Región": "Africa"},
-    {"Nombre": "Francia", "Población": 67902648, "Área(km²)": 551695, "Densidad(hab/km²)": 123.0, "Región": "Europe"},
-    {"Nombre": "Japón", "Población": 125847423, "Área(km²)": 377975, "Densidad(hab/km²)": 333.0, "Región": "Asia"}
-]
+# Dash serializa las respuestas con el codificador JSON de Plotly: forzar orjson (C, con soporte nativo de NumPy)
+pio.json.config.default_engine = "orjson"
 
 # Cargar el layout principal
 app.layout = generate_main_layout(app)
 
-# Callback para actualizar el mapa de calor
-@app.callback(
-    Output("choropleth-map", "figure"),
-    Input("metric-dropdown", "value")
-)
-def update_choropleth(metric):
+# Construcción del mapa de calor como figura dict para Dash
+def _build_choropleth(metric):
     """
-    Actualiza el mapa de calor según la métrica seleccionada.
+    Construye el mapa de calor según la métrica seleccionada.
     Args:
         metric (str): Métrica a visualizar (ej.: "Población", "Densidad").
     Returns:
-        plotly.graph_objects.Figure: Mapa actualizado.
+        dict: Mapa actualizado.
     """
     try:
-        # Convertir a DataFrame
-        df = pd.DataFrame(countries_data)
+        df = COUNTRIES_DF
+        metric = METRIC_COLUMNS.get(metric, metric)
         
         # Validar que la métrica exista en los datos
         if metric not in df.columns:
             raise ValueError(f"Métrica '{metric}' no encontrada en los datos")
         
         # Generar mapa de calor
-        return generate_choropleth_map(df.to_dict(orient="records"), metric)
+        return generate_choropleth_map(df, metric)
     except Exception as e:
         print(f"Error al actualizar el mapa de calor: {e}")
-        return generate_choropleth_map([], "Población")  # Devolver un mapa vacío en caso de error
+        return generate_choropleth_map(pd.DataFrame(), "Población")  # Devolver un mapa vacío en caso de error
 
-# Callback para actualizar el gráfico de barras
-@app.callback(
-    Output("bar-chart", "figure"),
-    Input("metric-dropdown", "value")
-)
-def update_bar_chart(metric):
+# Construcción del gráfico de barras como figura dict para Dash
+def _build_bar_chart(metric):
     """
-    Actualiza el gráfico de barras según la métrica seleccionada.
+    Construye el gráfico de barras según la métrica seleccionada.
     Args:
         metric (str): Métrica a visualizar (ej.: "Población", "Área").
     Returns:
-        plotly.graph_objects.Figure: Gráfico de barras actualizado.
+        dict: Gráfico de barras actualizado.
     """
     try:
-        # Simular llamada al backend (en producción, usar requests.get())
-        # Ejemplo: response = requests.get(f"https://api-url/api/v1/top-10/{metric}")
-        df = pd.DataFrame(countries_data)
+        df = COUNTRIES_DF
+        metric = METRIC_COLUMNS.get(metric, metric)
         
         # Validar que la métrica exista
         if metric not in df.columns:
             raise ValueError(f"Métrica '{metric}' no encontrada en los datos")
         
         # Generar gráfico de barras
-        return generate_bar_chart(df.to_dict(orient="records"), metric, top_n=10)
+        return generate_bar_chart(df, metric, top_n=10)
     except Exception as e:
         print(f"Error al actualizar el gráfico de barras: {e}")
-        return generate_bar_chart([], "Población")  # Devolver gráfico vacío en caso de error
+        return generate_bar_chart(pd.DataFrame(), "Población")  # Devolver gráfico vacío en caso de error
 
-# Callback para actualizar el gráfico de torta (pie chart)
-@app.callback(
-    Output("pie-chart", "figure"),
-    Input("metric-dropdown", "value")
-)
-def update_pie_chart(metric):
+# Construcción del gráfico de torta (pie chart) como figura dict para Dash
+def _build_pie_chart(metric):
     """
-    Actualiza el gráfico de torta según la métrica seleccionada.
+    Construye el gráfico de torta según la métrica seleccionada.
     Args:
         metric (str): Métrica a visualizar (ej.: "Población").
     Returns:
-        plotly.graph_objects.Figure: Gráfico de torta actualizado.
+        dict: Gráfico de torta actualizado.
     """
     try:
-        # Simular llamada al backend
-        df = pd.DataFrame(countries_data)
+        df = COUNTRIES_DF
+        metric = METRIC_COLUMNS.get(metric, metric)
         
         # Validar que la métrica exista
         if metric not in df.columns:
             raise ValueError(f"Métrica '{metric}' no encontrada en los datos")
         
         # Generar gráfico de torta
-        return generate_pie_chart(df.to_dict(orient="records"), metric)
+        return generate_pie_chart(df, metric, region_sums=REGION_SUMS)
     except Exception as e:
         print(f"Error al actualizar el gráfico de torta: {e}")
-        return generate_pie_chart([], "Población")  # Devolver gráfico vacío en caso de error
+        return generate_pie_chart(pd.DataFrame(), "Población")  # Devolver gráfico vacío en caso de error
 
-# Callback para actualizar el gráfico de dispersión
-@app.callback(
-    Output("scatter-chart", "figure"),
-    Input("metric-dropdown", "value")
-)
-def update_scatter_chart(metric):
+# Construcción del gráfico de dispersión como figura dict para Dash
+def _build_scatter_chart(metric):
     """
-    Actualiza el gráfico de dispersión entre dos métricas.
+    Construye el gráfico de dispersión entre dos métricas.
     Args:
         metric (str): Métrica para el eje Y (el eje X es fijo como "Área(km²)").
     Returns:
-        plotly.graph_objects.Figure: Gráfico de dispersión actualizado.
+        dict: Gráfico de dispersión actualizado.
     """
     try:
-        # Simular llamada al backend
-        df = pd.DataFrame(countries_data)
+        df = COUNTRIES_DF
+        metric = METRIC_COLUMNS.get(metric, metric)
         
         # Validar que la métrica exista
         if metric not in df.columns:
             raise ValueError(f"Métrica '{metric}' no encontrada en los datos")
         
         # Generar gráfico de dispersión (Área vs. Métrica seleccionada)
-        return generate_scatter_chart(df.to_dict(orient="records"), x_metric="Área(km²)", y_metric=metric)
+        return generate_scatter_chart(df, x_metric="Área(km²)", y_metric=metric)
     except Exception as e:
         print(f"Error al actualizar el gráfico de dispersión: {e}")
-        return generate_scatter_chart([], "Área(km²)", "Población")  # Devolver gráfico vacío en caso de error
+        return generate_scatter_chart(pd.DataFrame(), "Área(km²)", "Población")  # Devolver gráfico vacío en caso de error
 
-# Callback para actualizar el gráfico de líneas
-@app.callback(
-    Output("line-chart", "figure"),
-    Input("metric-dropdown", "value")
-)
-def update_line_chart(metric):
+# Construcción del gráfico de líneas como figura dict para Dash
+def _build_line_chart(metric):
     """
-    Actualiza el gráfico de líneas con tendencias históricas de una métrica por región.
+    Construye el gráfico de líneas con tendencias históricas de una métrica por región.
     Args:
         metric (str): Métrica a analizar (ej.: "Población").
     Returns:
-        plotly.graph_objects.Figure: Gráfico de líneas actualizado.
+        dict: Gráfico de líneas actualizado.
     """
     try:
-        # Simular llamada al backend
-        df = pd.DataFrame(countries_data)
+        df = COUNTRIES_DF
+        metric = METRIC_COLUMNS.get(metric, metric)
         
         # Validar que la métrica exista
         if metric not in df.columns:
             raise ValueError(f"Métrica '{metric}' no encontrada en los datos")
         
         # Generar gráfico de líneas (simulado para Europa)
-        return generate_line_chart(df.to_dict(orient="records"), metric, region="Asia")
+        return generate_line_chart(df, metric, region="Asia")
     except Exception as e:
         print(f"Error al actualizar el gráfico de líneas: {e}")
-        return generate_line_chart([], "Población", "Asia")  # Devolver gráfico vacío en caso de error
+        return generate_line_chart(pd.DataFrame(), "Población", "Asia")  # Devolver gráfico vacío en caso de error
 
-# Callback para actualizar la tabla de datos
+# Figuras precalculadas al iniciar: (gráfico, métrica) -> dict JSON listo para Dash
+_FIG_BUILDERS = {
+    "choropleth": _build_choropleth,
+    "bar": _build_bar_chart,
+    "pie": _build_pie_chart,
+    "scatter": _build_scatter_chart,
+    "line": _build_line_chart
+}
+_FIG_JSON_CACHE = {
+    (name, metric): build(metric)
+    for name, build in _FIG_BUILDERS.items()
+    for metric in METRIC_COLUMNS
+}
+
+# Índices del top 10 por columna de métrica, calculados una vez (los datos son estáticos)
+_TOP10_IDX = {
+    column: top_n_indices(COUNTRIES_DF[column].to_numpy(), 10)
+    for column in METRIC_COLUMNS.values()
+}
+
+# Callback único: un cambio del selector actualiza todas las figuras y la tabla en una sola respuesta
 @app.callback(
+    Output("choropleth-map", "figure"),
+    Output("bar-chart", "figure"),
+    Output("pie-chart", "figure"),
+    Output("scatter-chart", "figure"),
+    Output("line-chart", "figure"),
     Output("data-table", "children"),
     Input("metric-dropdown", "value")
 )
-def update_data_table(metric):
+def update_dashboard(metric):
+    """
+    Actualiza todos los componentes del dashboard según la métrica seleccionada.
+    Args:
+        metric (str): Métrica seleccionada en el dropdown (ej.: "population").
+    Returns:
+        tuple: Figuras (mapa, barras, torta, dispersión, líneas) y la tabla de datos.
+    """
+    # Servir el JSON precalculado y construir solo ante métricas desconocidas
+    figures = tuple(
+        _FIG_JSON_CACHE.get((name, metric)) or build(metric)
+        for name, build in _FIG_BUILDERS.items()
+    )
+    return figures + (_build_data_table(metric),)
+
+# Construcción de la tabla de datos: dbc.Table.from_dataframe recorre cada celda, así que se guarda por métrica
+@lru_cache(maxsize=8)
+def _build_data_table(metric):
     """
-    Actualiza la tabla de datos según la métrica seleccionada.
+    Construye la tabla de datos según la métrica seleccionada.
     Args:
         metric (str): Métrica a mostrar (ej.: "Población").
     Returns:
         dash.html.Table: Tabla actualizada.
     """
     try:
-        # Simular llamada al backend
-        df = pd.DataFrame(countries_data)
+        df = COUNTRIES_DF
+        metric = METRIC_COLUMNS.get(metric, metric)
         
         # Validar que la métrica exista
         if metric not in df.columns:
             raise ValueError(f"Métrica '{metric}' no encontrada en los datos")
         
-        # Ordenar por métrica y devolver tabla
-        df_sorted = df.sort_values(by=metric, ascending=False).head(10)
+        # Top 10 por métrica: índices precalculados, o selección parcial si la columna no los tiene
+        idx = _TOP10_IDX.get(metric)
+        if idx is None:
+            idx = top_n_indices(df[metric].to_numpy(), 10)
+        df_sorted = df.iloc[idx]
         return generate_data_table(df_sorted)
     except Exception as e:
         print(f"Error al actualizar la tabla de datos: {e}")
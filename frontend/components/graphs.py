@@ -1,186 +1,281 @@
 # graphs.py - Componentes gráficos reutilizables para el dashboard
 
-import plotly.express as px
+import base64
+import plotly.io as pio
+from plotly.colors import sequential
 import pandas as pd
+import numpy as np
+from _njit import top_n_indices
 from typing import List, Dict, Any, Optional
 
-def generate_choropleth_map(data: List[Dict[str, Any]], metric: str = "Densidad(hab/km²)") -> px.choropleth:
+# Rango de int32: los enteros que caben se envían en 4 bytes; los demás (ej.: sumas de población) en float64
+_INT32 = np.iinfo(np.int32)
+
+# Plantilla por defecto de Plotly serializada una vez; se incrusta en cada figura para conservar el estilo de px
+_TEMPLATE = pio.templates[pio.templates.default].to_plotly_json()
+
+# Escala Viridis en el formato [[posición, color], ...] que espera plotly.js
+_VIRIDIS = [[i / (len(sequential.Viridis) - 1), color] for i, color in enumerate(sequential.Viridis)]
+
+def _typed_array(values: np.ndarray, exact: bool = False) -> Dict[str, str]:
+    """
+    Codifica un arreglo numérico como typed array de Plotly (base64), que el navegador
+    decodifica sin parsear números JSON. Reduce a int32/float32 cuando la precisión alcanza.
+    
+    Args:
+        values (np.ndarray): Arreglo numérico unidimensional.
+        exact (bool): Conservar float64 para valores que se muestran tal cual
+            (ej.: el pie usa toPrecision(10) y float32 mostraría 2408.699951 en vez de 2408.7).
+        
+    Returns:
+        Dict[str, str]: {"dtype": ..., "bdata": ...} en el formato de Plotly.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        fits = values.size == 0 or (values.min() >= _INT32.min and values.max() <= _INT32.max)
+        values = values.astype("<i4" if fits else "<f8", copy=False)
+    else:
+        values = values.astype("<f8" if exact else "<f4", copy=False)
+    return {"dtype": values.dtype.str[1:], "bdata": base64.b64encode(values.tobytes()).decode("ascii")}
+
+def _figure(data: List[Dict[str, Any]], title: str, **layout: Any) -> Dict[str, Any]:
+    """
+    Arma una figura como dict con el esquema de Plotly, sin pasar por la validación de go.Figure.
+    
+    Args:
+        data (List[Dict]): Trazas de la figura.
+        title (str): Título del gráfico.
+        **layout: Propiedades adicionales del layout.
+        
+    Returns:
+        Dict[str, Any]: Figura lista para la propiedad "figure" de dcc.Graph.
+    """
+    return {
+        "data": data,
+        "layout": {"template": _TEMPLATE, "title": {"text": title}, "legend": {"tracegroupgap": 0}, **layout}
+    }
+
+def _axes(x_title: str, y_title: str) -> Dict[str, Any]:
+    """
+    Devuelve los ejes cartesianos con sus títulos, como los genera px.
+    
+    Args:
+        x_title (str): Título del eje X.
+        y_title (str): Título del eje Y.
+        
+    Returns:
+        Dict[str, Any]: Propiedades "xaxis" y "yaxis" del layout.
+    """
+    return {
+        "xaxis": {"anchor": "y", "domain": [0.0, 1.0], "title": {"text": x_title}},
+        "yaxis": {"anchor": "x", "domain": [0.0, 1.0], "title": {"text": y_title}}
+    }
+
+def generate_choropleth_map(df: pd.DataFrame, metric: str = "Densidad(hab/km²)") -> Dict[str, Any]:
     """
     Genera un mapa de calor (choropleth) basado en una métrica específica.
     
     Args:
-        data (List[Dict]): Lista de diccionarios con datos procesados de países.
+        df (pd.DataFrame): DataFrame con datos procesados de países.
         metric (str): Métrica a visualizar en el mapa (ej.: "Población", "Densidad").
         
     Returns:
-        px.choropleth: Mapa interactivo de Plotly.
+        Dict[str, Any]: Figura del mapa interactivo de Plotly.
     """
     try:
-        # Convertir datos a DataFrame para Plotly
-        df = pd.DataFrame(data)
-        
         # Validar que los campos necesarios existan
-        required_fields = ["Nombre", metric]
-        for field in required_fields:
-            if field not in df.columns:
-                raise ValueError(f"Campo faltante en los datos: {field}")
+        missing = {"Nombre", metric}.difference(df.columns)
+        if missing:
+            raise ValueError(f"Campos faltantes en los datos: {', '.join(sorted(missing))}")
         
         # Crear el mapa de calor
-        fig = px.choropleth(
-            df,
-            locations="Nombre",
-            locationmode="country names",
-            color=metric,
-            hover_name="Nombre",
-            color_continuous_scale="Viridis",
-            title=f"Distribución Mundial de {metric.capitalize()}"
+        names = df["Nombre"].tolist()
+        return _figure(
+            [{
+                "type": "choropleth",
+                "locations": names,
+                "locationmode": "country names",
+                "z": _typed_array(df[metric].to_numpy()),
+                "hovertext": names,
+                "hovertemplate": f"<b>%{{hovertext}}</b><br><br>Nombre=%{{location}}<br>{metric}=%{{z}}<extra></extra>",
+                "coloraxis": "coloraxis",
+                "geo": "geo",
+                "name": ""
+            }],
+            f"Distribución Mundial de {metric.capitalize()}",
+            geo={"domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]}, "center": {}},
+            coloraxis={"colorbar": {"title": {"text": metric}}, "colorscale": _VIRIDIS}
         )
-        return fig
     except Exception as e:
         print(f"Error al generar el mapa de calor: {e}")
-        return px.choropleth(title="Error al cargar el mapa")
+        return _figure([], "Error al cargar el mapa")
 
-def generate_bar_chart(data: List[Dict[str, Any]], metric: str = "Población", top_n: int = 10) -> px.bar:
+def generate_bar_chart(df: pd.DataFrame, metric: str = "Población", top_n: int = 10) -> Dict[str, Any]:
     """
     Genera un gráfico de barras con los países que tienen los valores más altos en una métrica.
     
     Args:
-        data (List[Dict]): Lista de diccionarios con datos procesados de países.
+        df (pd.DataFrame): DataFrame con datos procesados de países.
         metric (str): Métrica a visualizar (ej.: "Población", "Área(km²)").
         top_n (int): Número de países a mostrar (ej.: 10).
         
     Returns:
-        px.bar: Gráfico de barras interactivo.
+        Dict[str, Any]: Figura del gráfico de barras interactivo.
     """
     try:
-        # Convertir datos a DataFrame
-        df = pd.DataFrame(data)
-        
         # Validar que la métrica exista
         if metric not in df.columns:
             raise ValueError(f"Métrica '{metric}' no encontrada en los datos")
         
-        # Filtrar top N países por métrica
-        df_sorted = df.sort_values(by=metric, ascending=False).head(top_n)
+        # Filtrar top N países por métrica sin ordenar toda la columna
+        values = df[metric].to_numpy()
+        names = df["Nombre"].to_numpy()
+        idx = top_n_indices(values, top_n)
         
-        # Crear gráfico de barras
-        fig = px.bar(
-            df_sorted,
-            x="Nombre",
-            y=metric,
-            title=f"Top {top_n} Países por {metric.capitalize()}",
-            labels={"Nombre": "País", metric: metric.capitalize()}
+        # Crear gráfico de barras directamente desde los arreglos
+        label = metric.capitalize()
+        return _figure(
+            [{
+                "type": "bar",
+                "x": names[idx].tolist(),
+                "y": _typed_array(values[idx]),
+                "hovertemplate": f"País=%{{x}}<br>{label}=%{{y}}<extra></extra>",
+                "orientation": "v",
+                "showlegend": False,
+                "textposition": "auto",
+                "name": ""
+            }],
+            f"Top {top_n} Países por {label}",
+            barmode="relative",
+            **_axes("País", label)
         )
-        fig.update_layout(xaxis_title="País", yaxis_title=metric.capitalize())
-        return fig
     except Exception as e:
         print(f"Error al generar el gráfico de barras: {e}")
-        return px.bar(title="Error al cargar el gráfico")
+        return _figure([], "Error al cargar el gráfico")
 
-def generate_line_chart(data: List[Dict[str, Any]], metric: str = "Población", region: str = "Americas") -> px.line:
+def generate_line_chart(df: pd.DataFrame, metric: str = "Población", region: str = "Americas") -> Dict[str, Any]:
     """
     Genera un gráfico de líneas con datos históricos (simulados) de una métrica en una región.
     
     Args:
-        data (List[Dict]): Lista de diccionarios con datos de países.
+        df (pd.DataFrame): DataFrame con datos de países.
         metric (str): Métrica a visualizar (ej.: "Población").
         region (str): Región geográfica a analizar.
         
     Returns:
-        px.line: Gráfico de líneas interactivo.
+        Dict[str, Any]: Figura del gráfico de líneas interactivo.
     """
     try:
         # Simular datos históricos (ej.: crecimiento poblacional)
-        df = pd.DataFrame(data)
-        filtered = df[df["Región"].str.contains(region, case=False, na=False)]
+        filtered = df[df["Región"].to_numpy() == region]
         
         if filtered.empty:
             raise ValueError(f"No hay países en la región '{region}'")
         
-        # Simular datos temporales (ej.: crecimiento anual)
-        years = [2015, 2016, 2017, 2018, 2019, 2020]
-        line_data = []
-        for _, row in filtered.iterrows():
-            growth_rate = 0.01  # Tasa de crecimiento simulada
-            country_data = [{"Año": year, "País": row["Nombre"], metric: int(row[metric] * (1 + growth_rate) ** (year - 2015))} for year in years]
-            line_data.extend(country_data)
-        
-        df_line = pd.DataFrame(line_data)
-        
-        # Generar gráfico de líneas
-        fig = px.line(
-            df_line,
-            x="Año",
-            y=metric,
-            color="País",
-            title=f"Tendencia de {metric} en {region}",
-            labels={"Año": "Año", metric: metric.capitalize()}
+        # Simular datos temporales (ej.: crecimiento anual) con un producto exterior país × año
+        years = np.arange(2015, 2021)
+        growth_rate = 0.01  # Tasa de crecimiento simulada
+        factor = (1 + growth_rate) ** (years - 2015)
+        values = filtered[metric].to_numpy()
+        grid = np.outer(values, factor).astype(np.int64)
+        
+        # Generar gráfico de líneas: una traza por país, cada una con su fila de la grilla
+        label = metric.capitalize()
+        year_axis = _typed_array(years)
+        traces = [
+            {
+                "type": "scatter",
+                "mode": "lines",
+                "x": year_axis,
+                "y": _typed_array(row),
+                "name": name,
+                "legendgroup": name,
+                "hovertemplate": f"País={name}<br>Año=%{{x}}<br>{label}=%{{y}}<extra></extra>",
+                "orientation": "v",
+                "showlegend": True
+            }
+            for name, row in zip(filtered["Nombre"].tolist(), grid)
+        ]
+        return _figure(
+            traces,
+            f"Tendencia de {metric} en {region}",
+            legend={"title": {"text": "País"}, "tracegroupgap": 0},
+            **_axes("Año", label)
         )
-        return fig
     except Exception as e:
         print(f"Error al generar el gráfico de líneas: {e}")
-        return px.line(title="Error al cargar el gráfico")
+        return _figure([], "Error al cargar el gráfico")
 
-def generate_pie_chart(data: List[Dict[str, Any]], metric: str = "Población") -> px.pie:
+def generate_pie_chart(df: pd.DataFrame, metric: str = "Población", region_sums: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
     """
     Genera un gráfico de torta (pie) con la proporción de una métrica por región.
     
     Args:
-        data (List[Dict]): Lista de diccionarios con datos de países.
+        df (pd.DataFrame): DataFrame con datos de países.
         metric (str): Métrica a analizar (ej.: "Población").
+        region_sums (pd.DataFrame, opcional): Sumas por región ya calculadas (índice "Región"); evita el groupby.
         
     Returns:
-        px.pie: Gráfico de torta interactivo.
+        Dict[str, Any]: Figura del gráfico de torta interactivo.
     """
     try:
-        # Agrupar datos por región
-        df = pd.DataFrame(data)
-        region_stats = df.groupby("Región")[metric].sum().reset_index()
+        # Agrupar datos por región (o reutilizar el agregado precalculado)
+        if region_sums is None:
+            region_sums = df.groupby("Región")[[metric]].sum()
         
         # Generar gráfico de torta
-        fig = px.pie(
-            region_stats,
-            values=metric,
-            names="Región",
-            title=f"Distribución Mundial por {metric.capitalize()}",
-            labels={"Región": "Región", metric: metric.capitalize()}
+        return _figure(
+            [{
+                "type": "pie",
+                "values": _typed_array(region_sums[metric].to_numpy(), exact=True),
+                "labels": region_sums.index.tolist(),
+                "hovertemplate": f"Región=%{{label}}<br>{metric.capitalize()}=%{{value}}<extra></extra>",
+                "domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]},
+                "showlegend": True,
+                "name": ""
+            }],
+            f"Distribución Mundial por {metric.capitalize()}"
         )
-        return fig
     except Exception as e:
         print(f"Error al generar el gráfico de torta: {e}")
-        return px.pie(title="Error al cargar el gráfico")
+        return _figure([], "Error al cargar el gráfico")
 
-def generate_scatter_chart(data: List[Dict[str, Any]], x_metric: str = "Área(km²)", y_metric: str = "Población") -> px.scatter:
+def generate_scatter_chart(df: pd.DataFrame, x_metric: str = "Área(km²)", y_metric: str = "Población") -> Dict[str, Any]:
     """
     Genera un gráfico de dispersión entre dos métricas.
     
     Args:
-        data (List[Dict]): Lista de diccionarios con datos de países.
+        df (pd.DataFrame): DataFrame con datos de países.
         x_metric (str): Métrica para el eje X.
         y_metric (str): Métrica para el eje Y.
         
     Returns:
-        px.scatter: Gráfico de dispersión interactivo.
+        Dict[str, Any]: Figura del gráfico de dispersión interactivo.
     """
     try:
-        # Convertir datos a DataFrame
-        df = pd.DataFrame(data)
-        
-        # Validar métricas
-        for metric in [x_metric, y_metric]:
-            if metric not in df.columns:
-                raise ValueError(f"Métrica '{metric}' no encontrada en los datos")
+        # Validar métricas (y el nombre usado en el hover)
+        missing = {"Nombre", x_metric, y_metric}.difference(df.columns)
+        if missing:
+            raise ValueError(f"Campos faltantes en los datos: {', '.join(sorted(missing))}")
         
         # Generar gráfico de dispersión
-        fig = px.scatter(
-            df,
-            x=x_metric,
-            y=y_metric,
-            hover_name="Nombre",
-            title=f"Relación entre {x_metric} y {y_metric}",
-            labels={x_metric: x_metric.capitalize(), y_metric: y_metric.capitalize()}
+        x_label, y_label = x_metric.capitalize(), y_metric.capitalize()
+        return _figure(
+            [{
+                "type": "scatter",
+                "mode": "markers",
+                "x": _typed_array(df[x_metric].to_numpy()),
+                "y": _typed_array(df[y_metric].to_numpy()),
+                "hovertext": df["Nombre"].tolist(),
+                "hovertemplate": f"<b>%{{hovertext}}</b><br><br>{x_label}=%{{x}}<br>{y_label}=%{{y}}<extra></extra>",
+                "marker": {"symbol": "circle"},
+                "orientation": "v",
+                "showlegend": False,
+                "name": ""
+            }],
+            f"Relación entre {x_metric} y {y_metric}",
+            **_axes(x_label, y_label)
         )
-        return fig
     except Exception as e:
         print(f"Error al generar el gráfico de dispersión: {e}")
-        return px.scatter(title="Error al cargar el gráfico")
\ No newline at end of file
+        return _figure([], "Error al cargar el gráfico")
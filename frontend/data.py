@@ -0,0 +1,75 @@
+# data.py - Datos compartidos del dashboard, construidos una sola vez al importar
+
+import pandas as pd
+import pyarrow as pa
+from graphs import generate_choropleth_map, generate_bar_chart
+
+# Datos simulados para pruebas (en producción, se obtienen del backend)
+countries_data = [
+    {"Nombre": "China", "Población": 1402112000, "Área(km²)": 9596961, "Densidad(hab/km²)": 146.1, "Región": "Asia"},
+    {"Nombre": "India", "Población": 1380004385, "Área(km²)": 3287590, "Densidad(hab/km²)": 419.7, "Región": "Asia"},
+    {"Nombre": "EE.UU.", "Población": 331002651, "Área(km²)": 9833520, "Densidad(hab/km²)": 34.7, "Región": "Americas"},
+    {"Nombre": "Indonesia", "Población": 273523615, "Área(km²)": 1904569, "Densidad(hab/km²)": 143.6, "Región": "Asia"},
+    {"Nombre": "Pakistán", "Población": 220752339, "Área(km²)": 881912, "Densidad(hab/km²)": 250.3, "Región": "Asia"},
+    {"Nombre": "Brasil", "Población": 212559417, "Área(km²)": 8515767, "Densidad(hab/km²)": 24.9, "Región": "Americas"},
+    {"Nombre": "Nigeria", "Población": 206139589, "Área(km²)": 923768, "Densidad(hab/km²)": 223.1, "Región": "Africa"},
+    {"Nombre": "Bangladesh", "Población": 164689383, "Área(km²)": 147570, "Densidad(hab/km²)": 1116.0, "Región": "Asia"},
+    {"Nombre": "Rusia", "Población": 145934462, "Área(km²)": 17098242, "Densidad(hab/km²)": 8.5, "Región": "Europe"},
+    {"Nombre": "México", "Población": 128932753, "Área(km²)": 1964375, "Densidad(hab/km²)": 65.6, "Región": "Americas"},
+    {"Nombre": "Colombia", "Población": 50882891, "Área(km²)": 1141748, "Densidad(hab/km²)": 44.56, "Región": "Americas"},
+    {"Nombre": "Argentina", "Población": 45376763, "Área(km²)": 2780400, "Densidad(hab/km²)": 16.3, "Región": "Americas"},
+    {"Nombre": "Kenia", "Población": 53771296, "Área(km²)": 580367, "Densidad(hab/km²)": 92.7, "Región": "Africa"},
+    {"Nombre": "Francia", "Población": 67902648, "Área(km²)": 551695, "Densidad(hab/km²)": 123.0, "Región": "Europe"},
+    {"Nombre": "Japón", "Población": 125847423, "Área(km²)": 377975, "Densidad(hab/km²)": 333.0, "Región": "Asia"}
+]
+
+# Tabla Arrow con tipos explícitos, construida una sola vez al importar (sin inferir tipos celda por celda)
+_SCHEMA = pa.schema([
+    ("Nombre", pa.string()),
+    ("Población", pa.int64()),
+    ("Área(km²)", pa.int64()),
+    ("Densidad(hab/km²)", pa.float64()),
+    ("Región", pa.string())
+])
+_TABLE = pa.Table.from_pylist(countries_data, schema=_SCHEMA)
+
+def _numeric_column(name):
+    """
+    Devuelve una columna numérica de la tabla Arrow como vista NumPy, sin copiar el buffer.
+    Args:
+        name (str): Nombre de la columna.
+    Returns:
+        np.ndarray: Vista de solo lectura sobre los datos de la columna.
+    """
+    return _TABLE.column(name).combine_chunks().to_numpy(zero_copy_only=True)
+
+# Columnas (SoA): vistas NumPy de los buffers Arrow; los textos se materializan como arreglos de objetos
+_NAMES = _TABLE.column("Nombre").to_numpy()
+_POP = _numeric_column("Población")
+_AREA = _numeric_column("Área(km²)")
+_DENS = _numeric_column("Densidad(hab/km²)")
+_REGION = _TABLE.column("Región").to_numpy()
+_COLS = {
+    "Nombre": _NAMES,
+    "Población": _POP,
+    "Área(km²)": _AREA,
+    "Densidad(hab/km²)": _DENS,
+    "Región": _REGION
+}
+
+# DataFrame sobre esas mismas columnas, sin copiarlas (copy=False comparte los buffers Arrow); app y layout lo reutilizan
+COUNTRIES_DF = pd.DataFrame(_COLS, copy=False)
+
+# Valores del selector de métrica -> columna correspondiente en los datos
+METRIC_COLUMNS = {
+    "population": "Población",
+    "area": "Área(km²)",
+    "density": "Densidad(hab/km²)"
+}
+
+# Sumas por región de cada métrica, calculadas una vez para el gráfico de torta
+REGION_SUMS = COUNTRIES_DF.groupby("Región")[list(METRIC_COLUMNS.values())].sum()
+
+# Figuras iniciales del layout (métrica por defecto del selector: población)
+FIG_MAP = generate_choropleth_map(COUNTRIES_DF, "Población")
+FIG_BAR = generate_bar_chart(COUNTRIES_DF, "Población", top_n=10)
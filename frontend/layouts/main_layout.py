@@ -3,8 +3,7 @@
 import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
-import plotly.express as px
-import pandas as pd
+from data import FIG_MAP, FIG_BAR
 
 def generate_main_layout(app):
     """
@@ -14,42 +13,6 @@ def generate_main_layout(app):
     Returns:
         html.Div: Estructura del layout principal.
     """
-    # Datos simulados para el mapa (requiere token de Mapbox)
-    country_data = pd.DataFrame({
-        "name": ["Colombia", "Brazil", "France", "India", "China"],
-        "density": [44.56, 25.5, 120.0, 464.0, 153.0],
-        "iso3": ["COL", "BRA", "FRA", "IND", "CHN"]
-    })
-
-    # Crear mapa de calor (choropleth)
-    fig_map = px.choropleth(
-        country_data,
-        locations="iso3",
-        locationmode="country names",
-        color="density",
-        hover_name="name",
-        color_continuous_scale="Viridis",
-        title="Densidad Poblacional por País"
-    )
-
-    # Datos simulados para el gráfico de barras (top 10 países)
-    bar_data = pd.DataFrame({
-        "name": ["China", "India", "EE.UU.", "Indonesia", "Pakistán", 
-                 "Brasil", "Nigeria", "Bangladesh", "Rusia", "México"],
-        "population": [1402112000, 1380004385, 331002651, 273523615, 
-                       220752339, 212559417, 206139589, 164689383, 
-                       145934462, 128932753]
-    })
-
-    # Crear gráfico de barras inicial (top 10 países por población)
-    fig_bar = px.bar(
-        bar_data, 
-        x="name", 
-        y="population", 
-        title="Top 10 Países por Población",
-        labels={"name": "País", "population": "Población"}
-    )
-
     # Definir el layout principal del dashboard
     layout = html.Div([
         # Título del dashboard
@@ -83,7 +46,7 @@ def generate_main_layout(app):
                 html.H4("Mapa de Calor de Densidad Poblacional", className="text-center"),
                 dcc.Graph(
                     id="choropleth-map",
-                    figure=fig_map,
+                    figure=FIG_MAP,
                     config={"displayModeBar": False}
                 )
             ], width=12, lg=6, className="mb-4"),
@@ -93,12 +56,40 @@ def generate_main_layout(app):
                 html.H4("Top 10 Países por Métrica", className="text-center"),
                 dcc.Graph(
                     id="bar-chart",
-                    figure=fig_bar,
+                    figure=FIG_BAR,
                     config={"displayModeBar": False}
                 )
             ], width=12, lg=6, className="mb-4"),
         ]),
 
+        dbc.Row([
+            # Gráfico de torta por región
+            dbc.Col([
+                html.H4("Distribución por Región", className="text-center"),
+                dcc.Graph(id="pie-chart", config={"displayModeBar": False})
+            ], width=12, lg=6, className="mb-4"),
+
+            # Gráfico de dispersión (Área vs. Métrica)
+            dbc.Col([
+                html.H4("Relación entre Área y Métrica", className="text-center"),
+                dcc.Graph(id="scatter-chart", config={"displayModeBar": False})
+            ], width=12, lg=6, className="mb-4"),
+        ]),
+
+        dbc.Row([
+            # Gráfico de líneas con tendencia simulada
+            dbc.Col([
+                html.H4("Tendencia Histórica", className="text-center"),
+                dcc.Graph(id="line-chart", config={"displayModeBar": False})
+            ], width=12, lg=6, className="mb-4"),
+
+            # Tabla con los 10 países de mayor valor
+            dbc.Col([
+                html.H4("Top 10 Países (Tabla)", className="text-center"),
+                html.Div(id="data-table")
+            ], width=12, lg=6, className="mb-4"),
+        ]),
+
         # Footer
         dbc.Row([
             dbc.Col([
@@ -0,0 +1,90 @@
+# _njit.py - Núcleos numéricos compilados con Numba (opcional) para el dashboard
+
+import numpy as np
+
+# Numba es opcional: si está instalado, la selección top-N se compila a código nativo
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _sift_down(heap, values, size, j):
+        # Restaura el min-heap (según values) desde la posición j
+        while True:
+            left = 2 * j + 1
+            if left >= size:
+                return
+            child = left
+            right = left + 1
+            if right < size and values[heap[right]] < values[heap[left]]:
+                child = right
+            if values[heap[j]] <= values[heap[child]]:
+                return
+            heap[j], heap[child] = heap[child], heap[j]
+            j = child
+
+    @njit(cache=True)
+    def _top_n_kernel(values, n):
+        # Min-heap acotado a n índices: la raíz es el menor de los n mayores vistos
+        heap = np.empty(n, dtype=np.int64)
+        size = 0
+        for i in range(values.shape[0]):
+            # NaN no entra al heap (toda comparación con NaN es falsa); va al final, como en np.argsort
+            if values[i] != values[i]:
+                continue
+            if size < n:
+                j = size
+                heap[j] = i
+                size += 1
+                while j > 0:
+                    parent = (j - 1) // 2
+                    if values[heap[parent]] <= values[heap[j]]:
+                        break
+                    heap[parent], heap[j] = heap[j], heap[parent]
+                    j = parent
+            elif values[i] > values[heap[0]]:
+                heap[0] = i
+                _sift_down(heap, values, size, 0)
+
+        # Extraer el mínimo repetidamente, llenando la salida desde el final (orden descendente)
+        out = np.empty(n, dtype=np.int64)
+        filled = size
+        for k in range(size - 1, -1, -1):
+            out[k] = heap[0]
+            size -= 1
+            heap[0] = heap[size]
+            _sift_down(heap, values, size, 0)
+
+        # Completar con los NaN si no hubo n valores válidos
+        for i in range(values.shape[0]):
+            if filled == n:
+                break
+            if values[i] != values[i]:
+                out[filled] = i
+                filled += 1
+        return out
+
+def top_n_indices(values: np.ndarray, n: int = 10) -> np.ndarray:
+    """
+    Devuelve los índices de los n valores más altos, de mayor a menor.
+    Con Numba usa un heap acotado de tamaño n en una sola pasada; sin Numba,
+    np.argpartition y un orden de solo los n elegidos. En ambos casos los NaN quedan al final.
+    
+    Args:
+        values (np.ndarray): Arreglo numérico unidimensional.
+        n (int): Cantidad de índices a devolver.
+        
+    Returns:
+        np.ndarray: Índices (int64) de los n mayores valores en orden descendente.
+    """
+    n = min(n, len(values))
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    
+    if NUMBA_AVAILABLE:
+        return _top_n_kernel(values, n)
+    idx = np.argpartition(-values, n - 1)[:n]
+    return idx[np.argsort(-values[idx])]